@@ -1,25 +1,264 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+import gzip
 import hashlib
+import hmac
+import math
 import os
-from datetime import datetime
+import re
 import secrets
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from cachetools import TTLCache
+import numpy as np
+import orjson
+
+from config import Config
+from database import Database
+from utils import now_iso
+
+class ORJSONProvider(JSONProvider):
+    """Serve request and response JSON through orjson"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype='application/json')
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 
 # Simple CORS - allow all
 CORS(app, origins=['*'])
 
-# Simple in-memory storage
-users_db = {}
-sessions_db = {}
-predictions_db = {}
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Users and predictions persist in the Database; login tokens stay in memory
+db = Database(os.path.join(BASE_DIR, Config.DATA_PATH))
+registration_lock = threading.Lock()
+
+# Login tokens expire with the session lifetime. A live token is never
+# evicted to make room for someone else's; instead each email keeps its
+# newest SESSIONS_PER_USER tokens, which also bounds memory
+sessions_db = TTLCache(maxsize=math.inf, ttl=Config.PERMANENT_SESSION_LIFETIME.total_seconds())
+user_tokens = {}
+sessions_lock = threading.Lock()
+
+# Recently verified logins, so repeat logins skip the bcrypt KDF
+# Keys are peppered per process so a memory dump can't be checked offline
+login_cache = TTLCache(maxsize=10000, ttl=300)
+login_cache_pepper = secrets.token_bytes(32)
+login_cache_lock = threading.Lock()
+
+# Yes/no symptom answers and their risk weights, scored with one dot product
+SYMPTOM_FIELDS = (
+    'familyHistory', 'previousConditions', 'lumpPresent', 'nippleDischarge',
+    'skinChanges', 'breastPain', 'armpitSwelling', 'asymmetry'
+)
+SYMPTOM_WEIGHTS = np.array([20, 15, 25, 15, 20, 10, 22, 18], dtype=np.float32)
+
+# Measurements taken by the technical form, in the model's feature order
+TECHNICAL_FIELDS = (
+    'radiusMean', 'textureMean', 'perimeterMean',
+    'areaMean', 'smoothnessMean', 'compactnessMean'
+)
+
+# Prevention recommendations are shared, read-only dicts; handlers only
+# assemble lists of references to them
+def prevention(category, recommendation, priority, details):
+    return {
+        'category': category,
+        'recommendation': recommendation,
+        'priority': priority,
+        'details': details
+    }
+
+ANNUAL_MAMMOGRAM = prevention(
+    'Screening', 'Schedule annual mammograms', 'High',
+    'Women over 40 should have yearly mammograms.'
+)
+FAMILY_HISTORY_PREVENTIONS = (
+    prevention(
+        'Genetic Testing', 'Consider BRCA1/BRCA2 genetic testing', 'High',
+        'Family history increases risk.'
+    ),
+    prevention(
+        'Screening', 'Start screening earlier', 'High',
+        'Earlier screening recommended.'
+    )
+)
+LUMP_EXAM = prevention(
+    'Immediate Action', 'Schedule clinical breast exam immediately', 'Urgent',
+    'Any new lump should be evaluated.'
+)
+NIPPLE_DISCHARGE_EVALUATION = prevention(
+    'Medical Evaluation', 'Consult doctor about nipple discharge', 'High',
+    'Should be evaluated.'
+)
+SKIN_CHANGES_EVALUATION = prevention(
+    'Medical Evaluation', 'Get skin changes examined', 'High',
+    'Should be evaluated promptly.'
+)
+LYMPH_NODE_EVALUATION = prevention(
+    'Immediate Action', 'Evaluate lymph node swelling', 'Urgent',
+    'May indicate lymph node involvement.'
+)
+ASYMMETRY_EVALUATION = prevention(
+    'Medical Evaluation', 'Assess sudden breast asymmetry', 'High',
+    'Sudden changes should be evaluated.'
+)
+LIFESTYLE_PREVENTIONS = (
+    prevention('Lifestyle', 'Maintain healthy weight', 'Medium', 'Reduces breast cancer risk.'),
+    prevention('Lifestyle', 'Exercise regularly', 'Medium', 'Can reduce risk by 10-20%.'),
+    prevention('Lifestyle', 'Limit alcohol', 'Medium', 'Alcohol increases risk.')
+)
+URGENT_EVALUATION = prevention(
+    'Urgent', 'Schedule comprehensive medical evaluation', 'Urgent',
+    'High risk requires immediate attention.'
+)
+FOLLOW_UP_CONSULT = prevention(
+    'Follow-up', 'Consult healthcare provider', 'High',
+    'Moderate risk warrants evaluation.'
+)
+MALIGNANT_PREVENTIONS = (
+    prevention('Urgent', 'Consult oncologist immediately', 'Urgent', 'High malignancy probability.'),
+    prevention('Diagnostic', 'Schedule biopsy', 'Urgent', 'Confirmatory tests essential.')
+)
+BENIGN_PREVENTIONS = (
+    prevention('Follow-up', 'Schedule follow-up', 'Medium', 'Regular monitoring important.'),
+)
+
+# Symptom-triggered recommendations in response order; rule i is bit i of
+# the rule mask, with bit 0 set for patients over 40
+PREVENTION_RULES = (
+    ('ageOver40', (ANNUAL_MAMMOGRAM,)),
+    ('familyHistory', FAMILY_HISTORY_PREVENTIONS),
+    ('lumpPresent', (LUMP_EXAM,)),
+    ('nippleDischarge', (NIPPLE_DISCHARGE_EVALUATION,)),
+    ('skinChanges', (SKIN_CHANGES_EVALUATION,)),
+    ('armpitSwelling', (LYMPH_NODE_EVALUATION,)),
+    ('asymmetry', (ASYMMETRY_EVALUATION,))
+)
+PREVENTION_RULE_NAMES = [name for name, _ in PREVENTION_RULES]
+
+# Mask bit contributed by each symptom flag; the flag vector dotted with
+# this gives the symptom part of the rule mask in one operation
+SYMPTOM_RULE_BITS = np.array([
+    1 << PREVENTION_RULE_NAMES.index(field) if field in PREVENTION_RULE_NAMES else 0
+    for field in SYMPTOM_FIELDS
+], dtype=np.float32)
+
+# Every combination of triggered rules, resolved once at import
+PREVENTIONS_BY_RULE_MASK = tuple(
+    tuple(
+        recommendation
+        for bit, (_, recommendations) in enumerate(PREVENTION_RULES) if mask >> bit & 1
+        for recommendation in recommendations
+    )
+    for mask in range(1 << len(PREVENTION_RULES))
+)
+
+AI_RESPONSES = {
+    'symptom': 'Common symptoms include lumps, nipple discharge, skin changes, and breast pain.',
+    'prevention': 'Prevention includes regular screenings, healthy lifestyle, and limiting alcohol.',
+    'screening': 'Mammograms recommended annually for women over 40.',
+    'treatment': 'Treatment options include surgery, radiation, chemotherapy, and hormone therapy.',
+    'risk': 'Risk factors include age, family history, and genetic mutations.'
+}
+AI_DEFAULT_RESPONSE = 'I can help with questions about symptoms, prevention, screening, treatment, and risk factors.'
+AI_KEYWORDS = list(AI_RESPONSES)
+
+# One alternation scans the question once for every keyword
+AI_KEYWORD_PATTERN = re.compile('|'.join(map(re.escape, AI_KEYWORDS)))
+
+# Every possible reply is encoded once at import
+AI_RESPONSE_BODIES = {
+    keyword: orjson.dumps({'response': text}) for keyword, text in AI_RESPONSES.items()
+}
+AI_DEFAULT_RESPONSE_BODY = orjson.dumps({'response': AI_DEFAULT_RESPONSE})
+
+EDUCATIONAL_RESOURCES = [
+    {
+        'id': 1,
+        'title': 'Understanding Breast Cancer',
+        'description': 'Learn about breast cancer types and stages.',
+        'category': 'basics'
+    },
+    {
+        'id': 2,
+        'title': 'Early Detection and Screening',
+        'description': 'Importance of mammograms and self-exams.',
+        'category': 'screening'
+    },
+    {
+        'id': 3,
+        'title': 'Risk Factors and Prevention',
+        'description': 'Understand risk factors and prevention steps.',
+        'category': 'prevention'
+    },
+    {
+        'id': 4,
+        'title': 'Treatment Options',
+        'description': 'Overview of treatment options.',
+        'category': 'treatment'
+    },
+    {
+        'id': 5,
+        'title': 'Living with Breast Cancer',
+        'description': 'Support resources and coping strategies.',
+        'category': 'support'
+    }
+]
+
+# The resource list never changes, so it is encoded and compressed once
+EDUCATIONAL_RESOURCES_JSON = orjson.dumps(EDUCATIONAL_RESOURCES)
+EDUCATIONAL_RESOURCES_GZIP = gzip.compress(EDUCATIONAL_RESOURCES_JSON, compresslevel=6)
+EDUCATIONAL_RESOURCES_ETAG = hashlib.sha256(EDUCATIONAL_RESOURCES_JSON).hexdigest()[:16]
+
+# bcrypt releases the GIL; the pool caps concurrent hashes at one per core
+# so a burst of logins cannot starve prediction requests of CPU
+hash_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+
+# Checked against on unknown emails, so they cost as much as a wrong password
+DUMMY_PASSWORD_HASH = bcrypt.hashpw(secrets.token_bytes(16), bcrypt.gensalt(rounds=Config.BCRYPT_ROUNDS))
+
+def bcrypt_cost(hashed):
+    return int(hashed.split('$')[2])
 
 def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+    hashed = hash_pool.submit(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(rounds=Config.BCRYPT_ROUNDS)).result()
+    return hashed.decode('ascii')
+
+def check_password(user, password):
+    message = user['email'].encode() + b'|' + password.encode()
+    key = hmac.new(login_cache_pepper, message, hashlib.sha256).digest()
+    with login_cache_lock:
+        cached_hash = login_cache.get(key)
+    
+    # The stored hash is cached with the result, so a changed password misses
+    if cached_hash is not None and hmac.compare_digest(cached_hash, user['password']):
+        return True
+    
+    stored_hash = user['password'].encode('ascii')
+    if not hash_pool.submit(bcrypt.checkpw, password.encode('utf-8'), stored_hash).result():
+        return False
+    
+    with login_cache_lock:
+        login_cache[key] = user['password']
+    return True
 
 def generate_token():
-    return secrets.token_hex(32)
+    # 32 random bytes as 43 URL-safe characters rather than 64 hex digits
+    return secrets.token_urlsafe(32)
 
 @app.route('/')
 def home():
@@ -31,7 +270,10 @@ def register():
         return '', 204
     
     try:
-        data = request.json
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
+        
         email = data.get('email')
         password = data.get('password')
         name = data.get('name')
@@ -39,16 +281,25 @@ def register():
         if not email or not password or not name:
             return jsonify({'error': 'All fields required'}), 400
         
-        if email in users_db:
+        if not isinstance(email, str) or not isinstance(password, str):
+            return jsonify({'error': 'Email and password must be strings'}), 400
+        
+        if db.user_exists(email):
             return jsonify({'error': 'User already exists'}), 400
         
-        users_db[email] = {
+        user = {
             'name': name,
             'email': email,
             'password': hash_password(password),
-            'created_at': datetime.now().isoformat()
+            'created_at': now_iso()
         }
         
+        # Re-check under the lock; bcrypt ran unlocked and may have raced
+        with registration_lock:
+            if db.user_exists(email):
+                return jsonify({'error': 'User already exists'}), 400
+            db.create_user(email, user)
+        
         return jsonify({'message': 'Registration successful'}), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -59,19 +310,40 @@ def login():
         return '', 204
     
     try:
-        data = request.json
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
+        
         email = data.get('email')
         password = data.get('password')
         
         if not email or not password:
             return jsonify({'error': 'Email and password required'}), 400
         
-        user = users_db.get(email)
-        if not user or user['password'] != hash_password(password):
+        if not isinstance(email, str) or not isinstance(password, str):
+            return jsonify({'error': 'Email and password must be strings'}), 400
+        
+        user = db.get_user(email)
+        if not user:
+            hash_pool.submit(bcrypt.checkpw, password.encode('utf-8'), DUMMY_PASSWORD_HASH).result()
             return jsonify({'error': 'Invalid credentials'}), 401
         
+        if not check_password(user, password):
+            return jsonify({'error': 'Invalid credentials'}), 401
+        
+        # Bring hashes made at another cost to BCRYPT_ROUNDS, so a wrong
+        # password takes as long as the dummy check for unknown emails
+        if bcrypt_cost(user['password']) != Config.BCRYPT_ROUNDS:
+            user = dict(user, password=hash_password(password))
+            db.update_user(email, user)
+        
         token = generate_token()
-        sessions_db[token] = email
+        with sessions_lock:
+            tokens = user_tokens.setdefault(email, deque(maxlen=Config.SESSIONS_PER_USER))
+            if len(tokens) == tokens.maxlen:
+                sessions_db.pop(tokens[0], None)
+            tokens.append(token)
+            sessions_db[token] = email
         
         return jsonify({
             'message': 'Login successful',
@@ -82,277 +354,251 @@ def login():
         return jsonify({'error': str(e)}), 500
 
 def verify_token(token):
-    return sessions_db.get(token)
+    with sessions_lock:
+        return sessions_db.get(token)
+
+def authenticated_email():
+    """Email of the user whose bearer token is on the current request, or None"""
+    token = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    return verify_token(token)
+
+def malignant_probabilities(measurements):
+    """Malignant probability (%) for each row of TECHNICAL_FIELDS measurements"""
+    # Five times the mean measurement, the score this endpoint has always used
+    return np.minimum(measurements.mean(axis=1) * 5, 100)
+
+def symptom_risk_percentages(ages, flags):
+    """Risk percentage from age(s) and SYMPTOM_FIELDS flag rows; scalar or batch"""
+    risk_scores = np.where(ages > 50, ages * 0.5, ages * 0.2) + flags @ SYMPTOM_WEIGHTS
+    return np.minimum(risk_scores, 100)
+
+# Outcomes and leading preventions by tier: 0 up to 30%, 1 up to 60%, 2 above
+SYMPTOM_TIER_THRESHOLDS = (30, 60)
+SYMPTOM_OUTCOMES = ('Low Risk', 'Moderate Risk', 'High Risk')
+SYMPTOM_TIER_PREVENTIONS = ((), (FOLLOW_UP_CONSULT,), (URGENT_EVALUATION,))
+
+def symptom_tiers(risk_percentages):
+    # Integer tiers for scalars and arrays alike (adding bool arrays would OR them)
+    return np.searchsorted(SYMPTOM_TIER_THRESHOLDS, risk_percentages, side='left')
+
+# Outcomes and preventions indexed by malignant_probability > 50
+TECHNICAL_OUTCOMES = ('Benign', 'Malignant')
+TECHNICAL_PREVENTIONS = (BENIGN_PREVENTIONS, MALIGNANT_PREVENTIONS)
 
 @app.route('/api/predict/symptom-based', methods=['POST', 'OPTIONS'])
 def predict_symptom_based():
     if request.method == 'OPTIONS':
         return '', 204
     
-    token = request.headers.get('Authorization', '').replace('Bearer ', '')
-    user_email = verify_token(token)
+    user_email = authenticated_email()
     
     if not user_email:
         return jsonify({'error': 'Unauthorized'}), 401
     
     try:
-        data = request.json
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
         
         age = int(data.get('age', 0))
-        family_history = 1 if data.get('familyHistory') == 'yes' else 0
-        previous_conditions = 1 if data.get('previousConditions') == 'yes' else 0
-        lump_present = 1 if data.get('lumpPresent') == 'yes' else 0
-        nipple_discharge = 1 if data.get('nippleDischarge') == 'yes' else 0
-        skin_changes = 1 if data.get('skinChanges') == 'yes' else 0
-        breast_pain = 1 if data.get('breastPain') == 'yes' else 0
-        armpit_swelling = 1 if data.get('armpitSwelling') == 'yes' else 0
-        asymmetry = 1 if data.get('asymmetry') == 'yes' else 0
-        
-        risk_score = 0
-        risk_score += age * 0.5 if age > 50 else age * 0.2
-        risk_score += family_history * 20
-        risk_score += previous_conditions * 15
-        risk_score += lump_present * 25
-        risk_score += nipple_discharge * 15
-        risk_score += skin_changes * 20
-        risk_score += breast_pain * 10
-        risk_score += armpit_swelling * 22
-        risk_score += asymmetry * 18
-        
-        risk_percentage = min(risk_score, 100)
-        
-        preventions = []
-        
-        if age > 40:
-            preventions.append({
-                'category': 'Screening',
-                'recommendation': 'Schedule annual mammograms',
-                'priority': 'High',
-                'details': 'Women over 40 should have yearly mammograms.'
-            })
-        
-        if family_history:
-            preventions.extend([
-                {
-                    'category': 'Genetic Testing',
-                    'recommendation': 'Consider BRCA1/BRCA2 genetic testing',
-                    'priority': 'High',
-                    'details': 'Family history increases risk.'
-                },
-                {
-                    'category': 'Screening',
-                    'recommendation': 'Start screening earlier',
-                    'priority': 'High',
-                    'details': 'Earlier screening recommended.'
-                }
-            ])
-        
-        if lump_present:
-            preventions.append({
-                'category': 'Immediate Action',
-                'recommendation': 'Schedule clinical breast exam immediately',
-                'priority': 'Urgent',
-                'details': 'Any new lump should be evaluated.'
-            })
-        
-        if nipple_discharge:
-            preventions.append({
-                'category': 'Medical Evaluation',
-                'recommendation': 'Consult doctor about nipple discharge',
-                'priority': 'High',
-                'details': 'Should be evaluated.'
-            })
-        
-        if skin_changes:
-            preventions.append({
-                'category': 'Medical Evaluation',
-                'recommendation': 'Get skin changes examined',
-                'priority': 'High',
-                'details': 'Should be evaluated promptly.'
-            })
-        
-        if armpit_swelling:
-            preventions.append({
-                'category': 'Immediate Action',
-                'recommendation': 'Evaluate lymph node swelling',
-                'priority': 'Urgent',
-                'details': 'May indicate lymph node involvement.'
-            })
-        
-        if asymmetry:
-            preventions.append({
-                'category': 'Medical Evaluation',
-                'recommendation': 'Assess sudden breast asymmetry',
-                'priority': 'High',
-                'details': 'Sudden changes should be evaluated.'
-            })
-        
-        preventions.extend([
-            {
-                'category': 'Lifestyle',
-                'recommendation': 'Maintain healthy weight',
-                'priority': 'Medium',
-                'details': 'Reduces breast cancer risk.'
-            },
-            {
-                'category': 'Lifestyle',
-                'recommendation': 'Exercise regularly',
-                'priority': 'Medium',
-                'details': 'Can reduce risk by 10-20%.'
-            },
-            {
-                'category': 'Lifestyle',
-                'recommendation': 'Limit alcohol',
-                'priority': 'Medium',
-                'details': 'Alcohol increases risk.'
-            }
-        ])
-        
-        if risk_percentage > 60:
-            preventions.insert(0, {
-                'category': 'Urgent',
-                'recommendation': 'Schedule comprehensive medical evaluation',
-                'priority': 'Urgent',
-                'details': 'High risk requires immediate attention.'
-            })
-        elif risk_percentage > 30:
-            preventions.insert(0, {
-                'category': 'Follow-up',
-                'recommendation': 'Consult healthcare provider',
-                'priority': 'High',
-                'details': 'Moderate risk warrants evaluation.'
-            })
+        flags = np.fromiter(
+            (data.get(field) == 'yes' for field in SYMPTOM_FIELDS),
+            dtype=np.float32, count=len(SYMPTOM_FIELDS)
+        )
+        
+        risk_percentage = float(symptom_risk_percentages(age, flags))
+        tier = symptom_tiers(risk_percentage)
+        
+        rule_mask = int(flags @ SYMPTOM_RULE_BITS) | (age > 40)
+        preventions = [
+            *SYMPTOM_TIER_PREVENTIONS[tier],
+            *PREVENTIONS_BY_RULE_MASK[rule_mask],
+            *LIFESTYLE_PREVENTIONS
+        ]
         
         prediction = {
             'type': 'symptom-based',
             'risk_percentage': round(risk_percentage, 2),
-            'outcome': 'High Risk' if risk_percentage > 60 else 'Moderate Risk' if risk_percentage > 30 else 'Low Risk',
+            'outcome': SYMPTOM_OUTCOMES[tier],
             'preventions': preventions,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': now_iso()
         }
         
-        if user_email not in predictions_db:
-            predictions_db[user_email] = []
-        predictions_db[user_email].append(prediction)
+        db.save_prediction(user_email, prediction)
         
         return jsonify(prediction)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/predict/symptom-based/batch', methods=['POST', 'OPTIONS'])
+def predict_symptom_based_batch():
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    user_email = authenticated_email()
+    
+    if not user_email:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        patients = request.get_json(silent=True)
+        
+        if not isinstance(patients, list):
+            return jsonify({'error': 'Expected a list of patients'}), 400
+        
+        if len(patients) > Config.BATCH_LIMIT:
+            return jsonify({'error': f'At most {Config.BATCH_LIMIT} patients per request'}), 400
+        
+        if not all(isinstance(p, dict) for p in patients):
+            return jsonify({'error': 'Each patient must be a JSON object'}), 400
+        
+        ages = np.array([int(p.get('age', 0)) for p in patients], dtype=np.float32)
+        flags = np.array([
+            [1 if p.get(field) == 'yes' else 0 for field in SYMPTOM_FIELDS]
+            for p in patients
+        ], dtype=np.float32).reshape(len(patients), len(SYMPTOM_FIELDS))
+        
+        # One matrix-vector product scores every patient
+        risk_percentages = symptom_risk_percentages(ages, flags)
+        tiers = symptom_tiers(risk_percentages)
+        
+        return jsonify([
+            {
+                'risk_percentage': round(float(risk), 2),
+                'outcome': SYMPTOM_OUTCOMES[tier]
+            }
+            for risk, tier in zip(risk_percentages, tiers.tolist())
+        ])
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/predict/technical', methods=['POST', 'OPTIONS'])
 def predict_technical():
     if request.method == 'OPTIONS':
         return '', 204
     
-    token = request.headers.get('Authorization', '').replace('Bearer ', '')
-    user_email = verify_token(token)
+    user_email = authenticated_email()
     
     if not user_email:
         return jsonify({'error': 'Unauthorized'}), 401
     
     try:
-        data = request.json
-        
-        features = [
-            float(data.get('radiusMean', 0)),
-            float(data.get('textureMean', 0)),
-            float(data.get('perimeterMean', 0)),
-            float(data.get('areaMean', 0)),
-            float(data.get('smoothnessMean', 0)),
-            float(data.get('compactnessMean', 0))
-        ]
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
         
-        malignant_prob = min((sum(features) / len(features)) * 5, 100)
-        
-        preventions = []
-        
-        if malignant_prob > 50:
-            preventions.extend([
-                {
-                    'category': 'Urgent',
-                    'recommendation': 'Consult oncologist immediately',
-                    'priority': 'Urgent',
-                    'details': 'High malignancy probability.'
-                },
-                {
-                    'category': 'Diagnostic',
-                    'recommendation': 'Schedule biopsy',
-                    'priority': 'Urgent',
-                    'details': 'Confirmatory tests essential.'
-                }
-            ])
-        else:
-            preventions.append({
-                'category': 'Follow-up',
-                'recommendation': 'Schedule follow-up',
-                'priority': 'Medium',
-                'details': 'Regular monitoring important.'
-            })
+        measurements = np.array([
+            [float(data.get(field, 0)) for field in TECHNICAL_FIELDS]
+        ])
+        
+        if not np.isfinite(measurements).all():
+            return jsonify({'error': 'Measurements must be finite numbers'}), 400
+        
+        malignant_prob = float(malignant_probabilities(measurements)[0])
+        is_malignant = malignant_prob > 50
         
         prediction = {
             'type': 'technical',
             'malignant_probability': round(malignant_prob, 2),
             'benign_probability': round(100 - malignant_prob, 2),
-            'outcome': 'Malignant' if malignant_prob > 50 else 'Benign',
-            'preventions': preventions,
-            'timestamp': datetime.now().isoformat()
+            'outcome': TECHNICAL_OUTCOMES[is_malignant],
+            'preventions': list(TECHNICAL_PREVENTIONS[is_malignant]),
+            'timestamp': now_iso()
         }
         
-        if user_email not in predictions_db:
-            predictions_db[user_email] = []
-        predictions_db[user_email].append(prediction)
+        db.save_prediction(user_email, prediction)
         
         return jsonify(prediction)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/predict/technical/batch', methods=['POST', 'OPTIONS'])
+def predict_technical_batch():
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    user_email = authenticated_email()
+    
+    if not user_email:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        samples = request.get_json(silent=True)
+        
+        if not isinstance(samples, list):
+            return jsonify({'error': 'Expected a list of samples'}), 400
+        
+        if len(samples) > Config.BATCH_LIMIT:
+            return jsonify({'error': f'At most {Config.BATCH_LIMIT} samples per request'}), 400
+        
+        if not all(isinstance(s, dict) for s in samples):
+            return jsonify({'error': 'Each sample must be a JSON object'}), 400
+        
+        measurements = np.array([
+            [float(s.get(field, 0)) for field in TECHNICAL_FIELDS]
+            for s in samples
+        ]).reshape(len(samples), len(TECHNICAL_FIELDS))
+        
+        if not np.isfinite(measurements).all():
+            return jsonify({'error': 'Measurements must be finite numbers'}), 400
+        
+        # One vectorized expression scores every sample
+        malignant_probs = malignant_probabilities(measurements).tolist() if len(samples) else []
+        
+        return jsonify([
+            {
+                'malignant_probability': round(float(prob), 2),
+                'benign_probability': round(100 - float(prob), 2),
+                'outcome': TECHNICAL_OUTCOMES[prob > 50]
+            }
+            for prob in malignant_probs
+        ])
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/prediction-history', methods=['GET', 'OPTIONS'])
 def get_prediction_history():
     if request.method == 'OPTIONS':
         return '', 204
     
-    token = request.headers.get('Authorization', '').replace('Bearer ', '')
-    user_email = verify_token(token)
+    user_email = authenticated_email()
     
     if not user_email:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    history = predictions_db.get(user_email, [])
-    return jsonify(history)
+    # Stored lines are already JSON, so the history is never re-serialized
+    history = db.get_recent_predictions_json(user_email, Config.HISTORY_LIMIT)
+    return Response(history, mimetype='application/json')
 
 @app.route('/api/ai-assistance', methods=['POST', 'OPTIONS'])
 def ai_assistance():
     if request.method == 'OPTIONS':
         return '', 204
     
-    token = request.headers.get('Authorization', '').replace('Bearer ', '')
-    user_email = verify_token(token)
+    user_email = authenticated_email()
     
     if not user_email:
         return jsonify({'error': 'Unauthorized'}), 401
     
     try:
-        data = request.json
-        question = data.get('question', '').lower()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
         
-        responses = {
-            'symptom': 'Common symptoms include lumps, nipple discharge, skin changes, and breast pain.',
-            'prevention': 'Prevention includes regular screenings, healthy lifestyle, and limiting alcohol.',
-            'screening': 'Mammograms recommended annually for women over 40.',
-            'treatment': 'Treatment options include surgery, radiation, chemotherapy, and hormone therapy.',
-            'risk': 'Risk factors include age, family history, and genetic mutations.'
-        }
-        
-        response = 'I can help with questions about symptoms, prevention, screening, treatment, and risk factors.'
+        question = data.get('question', '').lower()
         
-        for key, value in responses.items():
-            if key in question:
-                response = value
-                break
+        # Earlier entries in AI_RESPONSES win when several keywords appear
+        found = AI_KEYWORD_PATTERN.findall(question)
+        if found:
+            body = AI_RESPONSE_BODIES[min(found, key=AI_KEYWORDS.index)]
+        else:
+            body = AI_DEFAULT_RESPONSE_BODY
         
-        return jsonify({'response': response})
+        return Response(body, mimetype='application/json')
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -362,40 +608,23 @@ def get_educational_resources():
     if request.method == 'OPTIONS':
         return '', 204
     
-    resources = [
-        {
-            'id': 1,
-            'title': 'Understanding Breast Cancer',
-            'description': 'Learn about breast cancer types and stages.',
-            'category': 'basics'
-        },
-        {
-            'id': 2,
-            'title': 'Early Detection and Screening',
-            'description': 'Importance of mammograms and self-exams.',
-            'category': 'screening'
-        },
-        {
-            'id': 3,
-            'title': 'Risk Factors and Prevention',
-            'description': 'Understand risk factors and prevention steps.',
-            'category': 'prevention'
-        },
-        {
-            'id': 4,
-            'title': 'Treatment Options',
-            'description': 'Overview of treatment options.',
-            'category': 'treatment'
-        },
-        {
-            'id': 5,
-            'title': 'Living with Breast Cancer',
-            'description': 'Support resources and coping strategies.',
-            'category': 'support'
-        }
-    ]
+    if request.accept_encodings['gzip']:
+        body, encoding, etag = EDUCATIONAL_RESOURCES_GZIP, 'gzip', EDUCATIONAL_RESOURCES_ETAG + '-gzip'
+    else:
+        body, encoding, etag = EDUCATIONAL_RESOURCES_JSON, None, EDUCATIONAL_RESOURCES_ETAG
+    
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+        if encoding:
+            response.content_encoding = encoding
     
-    return jsonify(resources)
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.max_age = 3600
+    return response
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
@@ -8,16 +8,32 @@ from datetime import timedelta
 class Config:
     """Base configuration"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
-    SESSION_TYPE = 'filesystem'
+    # Flask's default signed-cookie sessions; no server-side session store
     SESSION_PERMANENT = False
     PERMANENT_SESSION_LIFETIME = timedelta(hours=24)
     
+    # Live login tokens per email; a new login retires that user's oldest
+    SESSIONS_PER_USER = int(os.environ.get('SESSIONS_PER_USER') or 10)
+    
+    # bcrypt cost for new hashes; each step doubles the work per hash
+    # Hashes made at another cost are redone on their next successful login
+    BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS') or 10)
+    
     # CORS settings
     CORS_ORIGINS = ['http://localhost:8000', 'http://127.0.0.1:8000']
     
     # Model settings
-    MODEL_PATH = 'breast_cancer_model.pkl'
-    SCALER_PATH = 'scaler.pkl'
+    # Forest and scaler exported as plain arrays by train_model.py
+    MODEL_PATH = 'breast_cancer_model.npz'
+    
+    # File-based Database directory, relative to the backend package
+    DATA_PATH = os.environ.get('DATA_PATH') or 'data'
+    
+    # Most recent predictions returned by the history endpoint
+    HISTORY_LIMIT = int(os.environ.get('HISTORY_LIMIT') or 100)
+    
+    # Most items accepted by one batch prediction request
+    BATCH_LIMIT = int(os.environ.get('BATCH_LIMIT') or 1000)
     
     # Database settings (for production)
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///breast_cancer.db'
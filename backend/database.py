@@ -3,69 +3,130 @@ Database module for production use
 Replace in-memory storage with actual database
 """
 
-from datetime import datetime
-import json
+import hashlib
+import mmap
 import os
+import threading
+
+import orjson
 
 class Database:
-    """Simple file-based database for development"""
+    """
+    Simple file-based database for development
+    Records are appended as JSON lines, so a write never rewrites history
+    """
     
     def __init__(self, db_path='data'):
         self.db_path = db_path
-        if not os.path.exists(db_path):
-            os.makedirs(db_path)
+        self.predictions_dir = os.path.join(db_path, 'predictions')
+        if not os.path.exists(self.predictions_dir):
+            os.makedirs(self.predictions_dir)
         
-        self.users_file = os.path.join(db_path, 'users.json')
-        self.predictions_file = os.path.join(db_path, 'predictions.json')
+        self.users_file = os.path.join(db_path, 'users.jsonl')
         
-        # Initialize files if they don't exist
+        # Convert the old whole-file JSON stores on first run
+        self._users = {}
+        self._users_lock = threading.Lock()
         if not os.path.exists(self.users_file):
-            self._save_json(self.users_file, {})
-        if not os.path.exists(self.predictions_file):
-            self._save_json(self.predictions_file, {})
+            self._migrate_legacy()
+        
+        # Users are read from the log once; the last record for an email wins
+        self._users = {record['email']: record['data'] for record in self._iter_lines(self.users_file)}
+    
+    def _migrate_legacy(self):
+        users = self._load_json(os.path.join(self.db_path, 'users.json'))
+        predictions = self._load_json(os.path.join(self.db_path, 'predictions.json'))
+        
+        for user_email, records in predictions.items():
+            for record in records:
+                self.save_prediction(user_email, record)
+        
+        open(self.users_file, 'ab').close()
+        for email, user_data in users.items():
+            self.create_user(email, user_data)
     
     def _load_json(self, filepath):
         try:
-            with open(filepath, 'r') as f:
-                return json.load(f)
+            with open(filepath, 'rb') as f:
+                return orjson.loads(f.read())
         except:
             return {}
     
-    def _save_json(self, filepath, data):
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+    def _append_line(self, filepath, record):
+        with open(filepath, 'ab') as f:
+            f.write(orjson.dumps(record) + b'\n')
+    
+    def _iter_lines(self, filepath):
+        try:
+            with open(filepath, 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        yield orjson.loads(line)
+        except FileNotFoundError:
+            return
+    
+    def _predictions_file(self, user_email):
+        name = hashlib.sha1(user_email.encode()).hexdigest()
+        return os.path.join(self.predictions_dir, name + '.jsonl')
     
     # User operations
     def get_user(self, email):
-        users = self._load_json(self.users_file)
-        return users.get(email)
+        return self._users.get(email)
     
     def create_user(self, email, user_data):
-        users = self._load_json(self.users_file)
-        users[email] = user_data
-        self._save_json(self.users_file, users)
+        with self._users_lock:
+            self._append_line(self.users_file, {'email': email, 'data': user_data})
+            self._users[email] = user_data
     
     def user_exists(self, email):
-        users = self._load_json(self.users_file)
-        return email in users
+        return email in self._users
+    
+    def update_user(self, email, user_data):
+        # Appended like a new record; the last line for an email wins on load
+        with self._users_lock:
+            self._append_line(self.users_file, {'email': email, 'data': user_data})
+            self._users[email] = user_data
     
     # Prediction operations
     def save_prediction(self, user_email, prediction_data):
-        predictions = self._load_json(self.predictions_file)
-        
-        if user_email not in predictions:
-            predictions[user_email] = []
-        
-        predictions[user_email].append(prediction_data)
-        self._save_json(self.predictions_file, predictions)
+        self._append_line(self._predictions_file(user_email), prediction_data)
+    
+    def iter_user_predictions(self, user_email):
+        """Stream a user's predictions without loading the whole history"""
+        return self._iter_lines(self._predictions_file(user_email))
     
     def get_user_predictions(self, user_email):
-        predictions = self._load_json(self.predictions_file)
-        return predictions.get(user_email, [])
+        return list(self.iter_user_predictions(user_email))
+    
+    def get_recent_predictions_json(self, user_email, limit):
+        """The latest predictions as a JSON array, built from the stored lines as-is"""
+        try:
+            with open(self._predictions_file(user_email), 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b'[]'
+                
+                # Walk back from the end so only the returned lines are read
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    lines = []
+                    end = len(data)
+                    while end > 0 and len(lines) < limit:
+                        start = data.rfind(b'\n', 0, end) + 1
+                        line = data[start:end].strip()
+                        if line:
+                            lines.append(line)
+                        end = start - 1
+        except FileNotFoundError:
+            return b'[]'
+        
+        lines.reverse()
+        return b'[' + b','.join(lines) + b']'
     
     def get_prediction_count(self, user_email):
-        predictions = self.get_user_predictions(user_email)
-        return len(predictions)
+        try:
+            with open(self._predictions_file(user_email), 'rb') as f:
+                return sum(1 for line in f if line.strip())
+        except FileNotFoundError:
+            return 0
 
 # For production, use SQLAlchemy with PostgreSQL
 """
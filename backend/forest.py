@@ -0,0 +1,103 @@
+"""
+Array-based random forest inference
+A fitted forest is flattened into plain NumPy arrays, so serving needs
+neither pickle nor scikit-learn
+"""
+
+import numpy as np
+
+def _ordered_keys(values):
+    """Map float64 values to int64 keys that sort in the same order (and back)"""
+    bits = values.view(np.int64)
+    return bits ^ ((bits >> 63) & np.int64(0x7FFFFFFFFFFFFFFF))
+
+def _from_ordered_keys(keys):
+    return _ordered_keys(keys.view(np.float64)).view(np.float64)
+
+def _raw_thresholds(threshold, feature, mean, scale):
+    """
+    Fold the scaler into each split
+    Returns the largest raw float64 value whose scaled float32 form still
+    goes left, so comparing raw input against it matches the scaled tree exactly
+    """
+    inner = feature >= 0
+    t, m, s = threshold[inner], mean[feature[inner]], scale[feature[inner]]
+    
+    def goes_left(keys):
+        # Extreme probes overflow to +/-inf, which still orders correctly
+        with np.errstate(over='ignore'):
+            return ((_from_ordered_keys(keys) - m) / s).astype(np.float32) <= t
+    
+    # Binary search over every float64 between -max and +max, all splits at once
+    largest = np.finfo(np.float64).max
+    lo = np.full(len(t), _ordered_keys(np.array([-largest]))[0])
+    hi = np.full(len(t), _ordered_keys(np.array([largest]))[0])
+    always_left, never_left = goes_left(hi), ~goes_left(lo)
+    
+    while (lo + 1 < hi).any():
+        mid = (lo >> 1) + (hi >> 1) + (lo & hi & 1)
+        left = goes_left(mid)
+        lo = np.where(left, mid, lo)
+        hi = np.where(left, hi, mid)
+    
+    raw = threshold.copy()
+    raw[inner] = np.where(always_left, np.inf, np.where(never_left, -np.inf, _from_ordered_keys(lo)))
+    return raw
+
+def export_forest(model, scaler, path):
+    """Flatten a fitted RandomForestClassifier and its StandardScaler into an .npz file"""
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    roots = np.cumsum([0] + [tree.node_count for tree in trees[:-1]])
+    
+    left, right, feature, threshold, proba = [], [], [], [], []
+    for tree, root in zip(trees, roots):
+        nodes = np.arange(tree.node_count) + root
+        is_leaf = tree.children_left < 0
+        
+        # Leaves point at themselves so a traversal step leaves them in place
+        left.append(np.where(is_leaf, nodes, tree.children_left + root))
+        right.append(np.where(is_leaf, nodes, tree.children_right + root))
+        feature.append(tree.feature)
+        threshold.append(tree.threshold)
+        
+        value = tree.value[:, 0, :]
+        proba.append(value / value.sum(axis=1, keepdims=True))
+    
+    # Thresholds are moved into raw feature space, so serving never scales input
+    feature = np.concatenate(feature)
+    threshold = _raw_thresholds(np.concatenate(threshold), feature, scaler.mean_, scaler.scale_)
+    
+    np.savez(
+        path,
+        roots=roots.astype(np.int32),
+        left=np.concatenate(left).astype(np.int32),
+        right=np.concatenate(right).astype(np.int32),
+        feature=feature.astype(np.int16),
+        threshold=threshold,
+        proba=np.concatenate(proba),
+        classes=model.classes_,
+        mean=scaler.mean_
+    )
+
+def load_forest(path):
+    """Load an exported forest as a dict of arrays"""
+    with np.load(path) as arrays:
+        return {name: arrays[name] for name in arrays.files}
+
+def predict_proba(forest, features):
+    """
+    Class probabilities for raw (unscaled) feature rows
+    Matches RandomForestClassifier.predict_proba on the scaled input
+    """
+    features = np.asarray(features, dtype=np.float64)
+    rows = np.arange(len(features))[:, np.newaxis]
+    
+    # Walk every tree for every row at once, one level per step
+    nodes = np.broadcast_to(forest['roots'], (len(features), len(forest['roots'])))
+    feature = forest['feature'][nodes]
+    while (feature >= 0).any():
+        go_left = features[rows, feature] <= forest['threshold'][nodes]
+        nodes = np.where(go_left, forest['left'][nodes], forest['right'][nodes])
+        feature = forest['feature'][nodes]
+    
+    return forest['proba'][nodes].mean(axis=1)
@@ -0,0 +1,15 @@
+"""
+Gunicorn settings, picked up automatically from the working directory
+"""
+
+import os
+
+bind = '0.0.0.0:' + os.environ.get('PORT', '5000')
+
+# One process, many threads: the Database keeps every user record in process
+# memory, so a second worker would never see users registered in the first,
+# and login tokens are per-process too.
+# bcrypt and NumPy release the GIL, so threads still hash and score in parallel.
+worker_class = 'gthread'
+workers = 1
+threads = int(os.environ.get('GUNICORN_THREADS') or 2 * (os.cpu_count() or 1))
@@ -0,0 +1,115 @@
+"""
+Regression checks for the API endpoints
+Run with: python -m unittest test_app
+"""
+
+import os
+import tempfile
+import unittest
+
+import bcrypt
+
+# Keep the test database out of the repository's data directory
+os.environ['DATA_PATH'] = tempfile.mkdtemp()
+
+from app import app, bcrypt_cost, db
+from config import Config
+
+class PredictionTest(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        self.client.post('/api/register', json={'email': 'test@example.com', 'password': 'secret123', 'name': 'Test'})
+        token = self.client.post('/api/login', json={'email': 'test@example.com', 'password': 'secret123'}).get_json()['token']
+        self.headers = {'Authorization': 'Bearer ' + token}
+    
+    def test_batch_outcomes_match_single_predictions(self):
+        patients = [
+            {'age': '70', 'familyHistory': 'yes', 'lumpPresent': 'yes', 'skinChanges': 'yes'},
+            {'age': '45', 'lumpPresent': 'yes'},
+            {'age': '25'}
+        ]
+        
+        batch = self.client.post('/api/predict/symptom-based/batch', json=patients, headers=self.headers).get_json()
+        for patient, result in zip(patients, batch):
+            single = self.client.post('/api/predict/symptom-based', json=patient, headers=self.headers).get_json()
+            self.assertEqual(result['risk_percentage'], single['risk_percentage'])
+            self.assertEqual(result['outcome'], single['outcome'])
+        
+        self.assertEqual([result['outcome'] for result in batch], ['High Risk', 'Moderate Risk', 'Low Risk'])
+    
+    def test_batch_rejects_bad_patients(self):
+        url = '/api/predict/symptom-based/batch'
+        response = self.client.post(url, json=[{'age': '50'}, 5], headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        
+        response = self.client.post(url, json=[{}] * (Config.BATCH_LIMIT + 1), headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+    
+    def test_technical_batch_rejects_bad_samples(self):
+        url = '/api/predict/technical/batch'
+        response = self.client.post(url, json=[{'radiusMean': 17.99}, 'x'], headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        
+        response = self.client.post(url, json=[{}] * (Config.BATCH_LIMIT + 1), headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+    
+    def test_technical_scores_mean_measurement(self):
+        sample = {
+            'radiusMean': 10.2, 'textureMean': 12.5, 'perimeterMean': 40.0,
+            'areaMean': 30.0, 'smoothnessMean': 0.1, 'compactnessMean': 0.2
+        }
+        single = self.client.post('/api/predict/technical', json=sample, headers=self.headers).get_json()
+        batch = self.client.post('/api/predict/technical/batch', json=[sample], headers=self.headers).get_json()
+        
+        expected = min(sum(sample.values()) / len(sample) * 5, 100)
+        self.assertEqual(single['malignant_probability'], round(expected, 2))
+        self.assertEqual(batch[0]['malignant_probability'], round(expected, 2))
+    
+    def test_technical_rejects_non_finite_measurements(self):
+        response = self.client.post('/api/predict/technical', json={'radiusMean': 'nan'}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        
+        response = self.client.post('/api/predict/technical/batch', json=[{'areaMean': 'inf'}], headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+class LoginTest(unittest.TestCase):
+    def test_non_string_credentials_are_rejected(self):
+        client = app.test_client()
+        response = client.post('/api/register', json={'email': 123, 'password': 'secret123', 'name': 'Test'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(db.user_exists(123))
+        
+        response = client.post('/api/login', json={'email': 123, 'password': 'x'})
+        self.assertEqual(response.status_code, 400)
+        
+        response = client.post('/api/login', json={'email': 'test@example.com', 'password': ['x']})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_login_rehashes_to_configured_cost(self):
+        hashed = bcrypt.hashpw(b'secret123', bcrypt.gensalt(rounds=Config.BCRYPT_ROUNDS + 1)).decode('ascii')
+        db.create_user('legacy@example.com', {'name': 'Legacy', 'email': 'legacy@example.com', 'password': hashed})
+        
+        client = app.test_client()
+        response = client.post('/api/login', json={'email': 'legacy@example.com', 'password': 'secret123'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(bcrypt_cost(db.get_user('legacy@example.com')['password']), Config.BCRYPT_ROUNDS)
+    
+    def test_logins_only_retire_the_same_users_tokens(self):
+        client = app.test_client()
+        tokens = {}
+        for email in ('first@example.com', 'second@example.com'):
+            client.post('/api/register', json={'email': email, 'password': 'secret123', 'name': 'User'})
+            tokens[email] = [
+                client.post('/api/login', json={'email': email, 'password': 'secret123'}).get_json()['token']
+                for _ in range(Config.SESSIONS_PER_USER + 1)
+            ]
+        
+        def history_status(token):
+            return client.get('/api/prediction-history', headers={'Authorization': 'Bearer ' + token}).status_code
+        
+        self.assertEqual(history_status(tokens['first@example.com'][0]), 401)
+        self.assertEqual(history_status(tokens['first@example.com'][1]), 200)
+        self.assertEqual(history_status(tokens['second@example.com'][-1]), 200)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,6 +7,8 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
 import pickle
 
+from forest import export_forest
+
 # Load breast cancer dataset
 data = load_breast_cancer()
 X = data.data
@@ -38,5 +40,8 @@ with open('breast_cancer_model.pkl', 'wb') as f:
 with open('scaler.pkl', 'wb') as f:
     pickle.dump(scaler, f)
 
+# Plain arrays for serving; app.py loads these instead of the pickles
+export_forest(model, scaler, 'breast_cancer_model.npz')
+
 print("\nModel and scaler saved successfully!")
 print("Feature names:", data.feature_names)
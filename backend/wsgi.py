@@ -0,0 +1,8 @@
+"""
+WSGI entry point for gunicorn
+"""
+
+from app import app
+
+if __name__ == '__main__':
+    app.run()